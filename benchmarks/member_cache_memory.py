@@ -0,0 +1,161 @@
+"""Measure resident member memory for 'full' vs 'lean' MEMBER_CACHE_MODE.
+
+Builds a ConnectionState and guild with real discord.py objects, registers a
+pending chunk request the way chunk_guild does, and feeds synthetic
+GUILD_MEMBERS_CHUNK payloads through parse_guild_members_chunk. Each mode runs
+in its own subprocess, once for the process RSS growth and once under
+tracemalloc for the retained Python heap, both normalised per 10k members.
+RSS also keeps the allocator's high-water mark from decoding each chunk, which
+is why lean mode's RSS growth stays well above its retained heap.
+
+    python benchmarks/member_cache_memory.py --members 50000 --verified-ratio 0.05
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord.guild import Guild
+from discord.state import ChunkRequest, ConnectionState
+from utils.member_cache import VerifiedMemberCache
+
+GUILD_ID = 1000000000000000000
+CHUNK_SIZE = 1000  # members per GUILD_MEMBERS_CHUNK, as sent by Discord
+
+def member_payload(i: int) -> dict:
+    user_id = 2000000000000000000 + i
+    return {
+        'user': {
+            'id': str(user_id),
+            'username': f'member{i}',
+            'discriminator': '0',
+            'global_name': f'Member {i}',
+            'avatar': 'a' * 32,
+        },
+        'nick': None,
+        'roles': [str(GUILD_ID + 1)],
+        'joined_at': '2024-01-01T00:00:00+00:00',
+        'deaf': False,
+        'mute': False,
+        'flags': 0,
+    }
+
+def build_state(mode: str, members: int) -> ConnectionState:
+    intents = discord.Intents.default()
+    intents.members = True
+    options = {'intents': intents}
+    if mode == 'lean':
+        options['member_cache_flags'] = discord.MemberCacheFlags.none()
+        options['chunk_guilds_at_startup'] = False
+
+    state = ConnectionState(dispatch=lambda *args: None, handlers={}, hooks={}, http=None, **options)
+    guild = Guild(data={
+        'id': str(GUILD_ID),
+        'name': 'Benchmark Guild',
+        'roles': [{'id': str(GUILD_ID + 1), 'name': 'Member', 'permissions': '0', 'position': 1,
+                   'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'member_count': members,
+    }, state=state)
+    state._add_guild(guild)
+    return state
+
+def load_members(state: ConnectionState, loop: asyncio.AbstractEventLoop, members: int,
+                 verified: VerifiedMemberCache, verified_ratio: float):
+    # Same request chunk_guild registers (cache=False would come from chunk(cache=False))
+    request = ChunkRequest(GUILD_ID, 0, loop, state._get_guild, cache=state.member_cache_flags.joined)
+    state._chunk_requests[GUILD_ID] = request
+
+    verified_every = int(1 / verified_ratio) if verified_ratio > 0 else 0
+    chunk_count = -(-members // CHUNK_SIZE)
+    for chunk_index in range(chunk_count):
+        start = chunk_index * CHUNK_SIZE
+        ids = range(start, min(start + CHUNK_SIZE, members))
+        state.parse_guild_members_chunk({
+            'guild_id': str(GUILD_ID),
+            'members': [member_payload(i) for i in ids],
+            'chunk_index': chunk_index,
+            'chunk_count': chunk_count,
+            'nonce': request.nonce,
+        })
+        # The bot caches verified user IDs in both modes
+        for i in ids:
+            if verified_every and i % verified_every == 0:
+                verified.add(2000000000000000000 + i)
+
+def rss_bytes() -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def run_mode(mode: str, metric: str, members: int, verified_ratio: float) -> dict:
+    """Load members in this process and measure one metric ('rss' or 'heap')"""
+    loop = asyncio.new_event_loop()
+    gc.collect()
+    if metric == 'heap':
+        tracemalloc.start()
+        baseline = tracemalloc.take_snapshot()
+    else:
+        baseline = rss_bytes()
+
+    state = build_state(mode, members)
+    verified = VerifiedMemberCache(max_size=members)
+    load_members(state, loop, members, verified, verified_ratio)
+    gc.collect()
+
+    if metric == 'heap':
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        retained = sum(stat.size_diff for stat in snapshot.compare_to(baseline, 'filename'))
+    else:
+        retained = rss_bytes() - baseline
+
+    guild = state._get_guild(GUILD_ID)
+    return {'cached': len(guild._members), 'verified': len(verified),
+            'pending_requests': len(state._chunk_requests), 'retained': retained}
+
+def measure(mode: str, members: int, verified_ratio: float) -> dict:
+    """Run each metric in a fresh interpreter so modes and tracemalloc don't skew each other"""
+    results = {}
+    for metric in ('rss', 'heap'):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--members', str(members),
+             '--verified-ratio', str(verified_ratio), '--run', mode, metric],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[metric] = json.loads(output)
+
+    per_10k = 10000 / members / 1024 / 1024
+    rss, heap = results['rss']['retained'], results['heap']['retained']
+    print(f"{mode:>5}: {results['heap']['cached']:>7} cached by discord.py, "
+          f"{results['heap']['verified']:>6} verified IDs cached, "
+          f"RSS +{rss * per_10k:6.2f} MiB / heap {heap * per_10k:6.2f} MiB per 10k members")
+    return {'rss': rss, 'heap': heap}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, default=10000)
+    parser.add_argument('--verified-ratio', type=float, default=0.1,
+                        help='fraction of members that are verified (IDs cached in both modes)')
+    parser.add_argument('--run', nargs=2, metavar=('MODE', 'METRIC'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_mode(*args.run, args.members, args.verified_ratio)))
+        return
+
+    full = measure('full', args.members, args.verified_ratio)
+    lean = measure('lean', args.members, args.verified_ratio)
+    print(f"lean mode retains {lean['heap'] / full['heap']:.1%} of full mode's heap "
+          f"({lean['rss'] / full['rss']:.1%} of its RSS growth)")
+
+if __name__ == '__main__':
+    main()
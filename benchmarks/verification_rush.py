@@ -0,0 +1,204 @@
+"""Offline load test for the verification rush of a big server launch.
+
+Each simulated user goes through the same two steps as a real one:
+
+  verify    - the bot stores a pending verification (what /verify does)
+  callback  - the browser hits /callback on web_server.app, which exchanges
+              the code and fetches userinfo from Roblox OAuth
+
+Roblox OAuth is replaced by a local stub (with optional artificial latency),
+web_server.app is served by a threaded werkzeug server, and everything uses a
+throwaway SQLite database.
+
+    python benchmarks/verification_rush.py --users 2000 --concurrency 200 --stub-latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Point the app at a throwaway database before anything imports it
+_tmp_dir = tempfile.mkdtemp(prefix='verification-rush-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp_dir, 'rush.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from werkzeug.serving import make_server
+from config import config
+from database import db
+from utils.roblox_api import roblox_api
+
+class StageStats:
+    """Collects latencies and errors per stage; safe to use from several threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_kinds = defaultdict(lambda: defaultdict(int))
+
+    def record(self, stage: str, seconds: float, error: str = None):
+        with self._lock:
+            self.latencies[stage].append(seconds)
+            if error:
+                self.errors[stage] += 1
+                self.error_kinds[stage][error] += 1
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def make_stub_handler(stats: StageStats, latency: float, failure_rate: float):
+    class RobloxOAuthStub(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _should_fail(self) -> bool:
+            return failure_rate > 0 and secrets.randbelow(10000) < failure_rate * 10000
+
+        def do_POST(self):
+            started = time.perf_counter()
+            length = int(self.headers.get('Content-Length', 0))
+            form = parse_qs(self.rfile.read(length).decode())
+            time.sleep(latency)
+            if self.path != '/v1/token' or self._should_fail():
+                self._reply(500, {'error': 'server_error'})
+                stats.record('roblox_token', time.perf_counter() - started, 'stub 500')
+                return
+            # The code carries the simulated user's Roblox ID
+            code = form.get('code', [''])[0]
+            self._reply(200, {'access_token': f"token-{code}", 'token_type': 'Bearer'})
+            stats.record('roblox_token', time.perf_counter() - started)
+
+        def do_GET(self):
+            started = time.perf_counter()
+            time.sleep(latency)
+            if self.path != '/v1/userinfo' or self._should_fail():
+                self._reply(500, {'error': 'server_error'})
+                stats.record('roblox_userinfo', time.perf_counter() - started, 'stub 500')
+                return
+            roblox_id = self.headers.get('Authorization', '').rsplit('-', 1)[-1]
+            self._reply(200, {'sub': roblox_id, 'name': f"rush_user_{roblox_id}"})
+            stats.record('roblox_userinfo', time.perf_counter() - started)
+
+    return RobloxOAuthStub
+
+def start_server(server) -> threading.Thread:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+async def simulate_user(i: int, session: aiohttp.ClientSession, callback_url: str, stats: StageStats,
+                        semaphore: asyncio.Semaphore):
+    discord_id = 100000000000000000 + i
+    roblox_id = 5000000 + i
+    state_code = secrets.token_urlsafe(32)
+
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            await db.create_pending_verification(discord_id, state_code, guild_id=1)
+        except Exception as e:
+            stats.record('verify', time.perf_counter() - started, type(e).__name__)
+            return
+        stats.record('verify', time.perf_counter() - started)
+
+        started = time.perf_counter()
+        try:
+            async with session.get(callback_url, params={'code': str(roblox_id), 'state': state_code}) as resp:
+                await resp.read()
+                error = None if resp.status == 200 else f"HTTP {resp.status}"
+        except Exception as e:
+            error = type(e).__name__
+        stats.record('callback', time.perf_counter() - started, error)
+
+async def run_rush(users: int, concurrency: int, callback_url: str, stats: StageStats) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(simulate_user(i, session, callback_url, stats, semaphore) for i in range(users)))
+        return time.perf_counter() - started
+
+def print_report(stats: StageStats, users: int, elapsed: float):
+    print(f"\n{users} flows in {elapsed:.2f}s -> {users / elapsed:.1f} flows/s end to end\n")
+    print(f"{'stage':<16}{'count':>8}{'errors':>8}{'err %':>8}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for stage in ('verify', 'callback', 'roblox_token', 'roblox_userinfo'):
+        values = sorted(stats.latencies.get(stage, []))
+        if not values:
+            continue
+        errors = stats.errors.get(stage, 0)
+        print(f"{stage:<16}{len(values):>8}{errors:>8}{errors / len(values):>8.1%}{len(values) / elapsed:>9.1f}"
+              f"{percentile(values, 50) * 1000:>9.1f}{percentile(values, 90) * 1000:>9.1f}"
+              f"{percentile(values, 99) * 1000:>9.1f}{values[-1] * 1000:>9.1f}")
+
+    for stage, kinds in stats.error_kinds.items():
+        summary = ', '.join(f"{kind} x{count}" for kind, count in sorted(kinds.items(), key=lambda k: -k[1]))
+        print(f"  {stage} errors: {summary}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000, help='number of simulated verification flows')
+    parser.add_argument('--concurrency', type=int, default=100, help='flows in flight at once')
+    parser.add_argument('--stub-latency-ms', type=float, default=0, help='artificial Roblox OAuth latency')
+    parser.add_argument('--stub-failure-rate', type=float, default=0, help='fraction of Roblox OAuth calls that fail')
+    args = parser.parse_args()
+
+    stats = StageStats()
+
+    stub = ThreadingHTTPServer(('127.0.0.1', 0), make_stub_handler(stats, args.stub_latency_ms / 1000,
+                                                                   args.stub_failure_rate))
+    stub.daemon_threads = True
+    start_server(stub)
+    roblox_api.oauth_url = f"http://127.0.0.1:{stub.server_port}"
+
+    config.ROBLOX_CLIENT_ID = 'load-test-client'
+    config.ROBLOX_CLIENT_SECRET = 'load-test-secret'
+    config.ROBLOX_REDIRECT_URI = 'http://127.0.0.1/callback'
+
+    # Imported late so init_db() runs against the throwaway database
+    from web_server import app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    web = make_server('127.0.0.1', 0, app, threaded=True)
+    start_server(web)
+    callback_url = f"http://127.0.0.1:{web.server_port}/callback"
+
+    print(f"Database: {db.db_path}")
+    print(f"Roblox OAuth stub: {roblox_api.oauth_url} ({args.stub_latency_ms:.0f}ms latency, "
+          f"{args.stub_failure_rate:.1%} failures)")
+    print(f"Running {args.users} flows at concurrency {args.concurrency} against {callback_url}")
+
+    elapsed = asyncio.run(run_rush(args.users, args.concurrency, callback_url, stats))
+    print_report(stats, args.users, elapsed)
+
+    web.shutdown()
+    stub.shutdown()
+    shutil.rmtree(_tmp_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
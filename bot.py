@@ -1,36 +1,137 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import asyncio
+import multiprocessing
 import os
 import threading
 from database import db
 from config import config
+from utils.guild_cache import GuildSettingsCache
+from utils.loop_monitor import LoopBlockDetector
+from utils.member_cache import VerifiedMemberCache
+from utils.report_dispatcher import ReportDispatcher
+from utils.sharding import ShardMonitor, parse_shard_ids, split_shard_ids
 
 # Setup intents
 intents = discord.Intents.default()
 intents.members = True
-intents.message_content = True
+if config.ENABLE_PREFIX_COMMANDS:
+    intents.message_content = True
+else:
+    # Verification runs on /verify and the Verify button, so guild message
+    # events aren't needed at all
+    intents.guild_messages = False
 
-class AuthChecker(commands.Bot):
-    def __init__(self):
+def member_cache_options() -> dict:
+    """discord.py member caching options for the configured MEMBER_CACHE_MODE"""
+    if config.MEMBER_CACHE_MODE == 'lean':
+        # Keep no members resident and skip startup chunking; slash commands and
+        # the Verify button carry full member data in the interaction payload
+        return {
+            'member_cache_flags': discord.MemberCacheFlags.none(),
+            'chunk_guilds_at_startup': False
+        }
+    return {}
+
+class AuthChecker(commands.AutoShardedBot):
+    def __init__(self, shard_count: int = None, shard_ids: list = None):
         super().__init__(
-            command_prefix='!',
+            # Without message_content a '!' prefix can never match (and discord.py warns about it)
+            command_prefix='!' if config.ENABLE_PREFIX_COMMANDS else commands.when_mentioned,
             intents=intents,
-            help_command=None
+            help_command=None,
+            shard_count=shard_count,
+            shard_ids=shard_ids,
+            **member_cache_options()
+        )
+        self.settings_cache = GuildSettingsCache()
+        self.verified_members = VerifiedMemberCache(config.VERIFIED_MEMBER_CACHE_SIZE, config.VERIFIED_MEMBER_CACHE_TTL)
+        self.shard_monitor = ShardMonitor()
+        self.reports = ReportDispatcher(
+            config.REPORT_FLUSH_SECONDS,
+            config.REPORT_CHANNEL_RATE,
+            config.REPORT_CHANNEL_PER_SECONDS
         )
-    
+        self.loop_monitor = None
+
     async def setup_hook(self):
+        if config.LOOP_BLOCK_THRESHOLD_MS > 0:
+            self.loop_monitor = LoopBlockDetector(asyncio.get_running_loop(), config.LOOP_BLOCK_THRESHOLD_MS / 1000)
+            self.loop_monitor.start()
+
         # Load cogs
         await self.load_extension('cogs.verification')
         await self.load_extension('cogs.background_check')
-        
-        # Sync commands
-        await self.tree.sync()
-        print("Commands synced")
-    
+
+        # Sync commands (once per deployment: only the process owning shard 0,
+        # since every sync overwrites the global command set)
+        if self.shard_ids is None or 0 in self.shard_ids:
+            await self.tree.sync()
+            print("Commands synced")
+
+        self.report_shard_status.change_interval(seconds=config.SHARD_STATUS_INTERVAL)
+        self.report_shard_status.start()
+
+    async def close(self):
+        # Deliver queued reports while the connection is still up
+        await self.reports.flush()
+        if self.loop_monitor:
+            self.loop_monitor.stop()
+        await super().close()
+
     async def on_ready(self):
         print(f'Bot logged in as {self.user}')
-        print(f'In {len(self.guilds)} guilds')
+        print(f'In {len(self.guilds)} guilds across shards {sorted(self.shards)}')
+
+    async def get_guild_settings(self, guild_id: int) -> dict:
+        return await self.settings_cache.get(guild_id)
+
+    async def is_verified(self, user_id: int) -> bool:
+        """db.is_verified with a short-lived cache of positive results"""
+        if user_id in self.verified_members:
+            return True
+        if await db.is_verified(user_id):
+            self.verified_members.add(user_id)
+            return True
+        return False
+
+    def shard_guild_ids(self, shard_id: int) -> list:
+        return [guild.id for guild in self.guilds if guild.shard_id == shard_id]
+
+    async def resync_shard_state(self, shard_id: int):
+        """Bring per-guild state back in line after a shard (re)connects"""
+        guild_ids = self.shard_guild_ids(shard_id)
+        # Settings may have changed on the dashboard while events were missed
+        # (pending verifications live in the database and expire on lookup)
+        self.settings_cache.invalidate(guild_ids)
+
+    async def on_shard_connect(self, shard_id: int):
+        self.shard_monitor.mark(shard_id, 'connecting')
+
+    async def on_shard_ready(self, shard_id: int):
+        self.shard_monitor.mark(shard_id, 'ready')
+        print(f'Shard {shard_id} ready')
+        await self.resync_shard_state(shard_id)
+
+    async def on_shard_resumed(self, shard_id: int):
+        self.shard_monitor.mark(shard_id, 'resumed')
+        print(f'Shard {shard_id} resumed')
+        await self.resync_shard_state(shard_id)
+
+    async def on_shard_disconnect(self, shard_id: int):
+        self.shard_monitor.mark(shard_id, 'disconnected')
+        print(f'Shard {shard_id} disconnected')
+
+    @tasks.loop(seconds=30)
+    async def report_shard_status(self):
+        try:
+            await db.save_shard_status(self.shard_monitor.snapshot(self), os.getpid(), self.shard_count)
+        except Exception as e:
+            print(f"Error saving shard status: {e}")
+
+    @report_shard_status.before_loop
+    async def before_report_shard_status(self):
+        await self.wait_until_ready()
 
 def run_flask_app():
     """Run Flask in background thread"""
@@ -39,27 +140,58 @@ def run_flask_app():
     port = int(os.environ.get('PORT', 10000))
     app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
 
+def run_bot(token: str, shard_count: int = None, shard_ids: list = None):
+    """Run one bot instance (optionally restricted to a range of shards)"""
+    bot = AuthChecker(shard_count=shard_count, shard_ids=shard_ids)
+    bot.run(token)
+
 def main():
     # Initialize database
     asyncio.run(db.init())
-    
+
     # Check if credentials exist
     creds = db.get_credentials()
     token = creds.get('discord_token') or config.DISCORD_TOKEN
-    
+
     if not token:
         print("ERROR: No Discord token configured!")
         print("Please set up the bot via the dashboard first.")
         return
-    
+
+    # Without sharding enabled, keep a single gateway connection
+    shard_count = config.SHARD_COUNT if config.SHARDED else 1
+    shard_ids = parse_shard_ids(config.SHARD_IDS) if config.SHARDED else None
+
+    if config.SHARDED and (shard_ids or config.SHARD_PROCESSES > 1) and not shard_count:
+        print("ERROR: SHARD_COUNT must be set when using SHARD_IDS or SHARD_PROCESSES")
+        return
+
+    if shard_count:
+        # Recorded up front so /health/shards can spot shards that never come up
+        asyncio.run(db.save_shard_count(shard_count))
+
+    processes = []
+    if config.SHARDED and config.SHARD_PROCESSES > 1:
+        # Spawn (not fork) so each process gets a clean event loop and connection pool
+        ctx = multiprocessing.get_context('spawn')
+        for shard_range in split_shard_ids(shard_ids or list(range(shard_count)), config.SHARD_PROCESSES):
+            process = ctx.Process(target=run_bot, args=(token, shard_count, shard_range), daemon=True)
+            process.start()
+            processes.append(process)
+            print(f"Started shard process {process.pid} for shards {shard_range}")
+
     # Start Flask web server in background
     flask_thread = threading.Thread(target=run_flask_app, daemon=True)
     flask_thread.start()
     print("Web server started")
-    
+
+    if processes:
+        for process in processes:
+            process.join()
+        return
+
     # Start bot
-    bot = AuthChecker()
-    bot.run(token)
+    run_bot(token, shard_count, shard_ids)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
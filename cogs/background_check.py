@@ -1,21 +1,50 @@
 import discord
 from discord import app_commands
-from discord.ext import commands
-from datetime import datetime
+from discord.ext import commands, tasks
+from datetime import datetime, timedelta, timezone
+from config import config
 from database import db
-from utils.roblox_api import roblox_api
+from utils.group_graph import group_index
+from utils.roblox_api import roblox_api, RobloxAPIUnavailable
 
 class BackgroundCheck(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
     
+    async def cog_load(self):
+        if config.GROUP_ALLY_HOPS > 0:
+            self.refresh_group_graph.change_interval(minutes=config.GROUP_CRAWL_INTERVAL_MINUTES)
+            self.refresh_group_graph.start()
+    
+    async def cog_unload(self):
+        self.refresh_group_graph.cancel()
+    
+    @tasks.loop(minutes=60)
+    async def refresh_group_graph(self):
+        """Keep the ally graph and reachability sets used by /check up to date"""
+        try:
+            # With shards split across processes, only the process owning shard 0 crawls;
+            # the others rebuild from the shared database
+            if self.bot.shard_ids is None or 0 in self.bot.shard_ids:
+                crawled = await group_index.refresh(
+                    config.GROUP_ALLY_HOPS,
+                    timedelta(hours=config.GROUP_RECRAWL_AFTER_HOURS),
+                    config.GROUP_CRAWL_REQUESTS_PER_SECOND
+                )
+                if crawled:
+                    print(f"Group graph refreshed ({crawled} groups crawled)")
+            else:
+                await group_index.rebuild(await db.get_all_blacklisted_groups(), config.GROUP_ALLY_HOPS)
+        except Exception as e:
+            print(f"Error refreshing group graph: {e}")
+    
     async def assign_verified_role(self, member: discord.Member):
         """Assign BotVerified role if verified in database"""
         bot_verified_role = discord.utils.get(member.guild.roles, name="BotVerified")
         if not bot_verified_role:
             return False
         
-        if await db.is_verified(member.id):
+        if await self.bot.is_verified(member.id):
             if bot_verified_role not in member.roles:
                 try:
                     await member.add_roles(bot_verified_role)
@@ -34,9 +63,11 @@ class BackgroundCheck(commands.Cog):
         verified_data = await db.get_verified_user(user.id)
         
         if not verified_data:
-            await interaction.followup.send(f"❌ {user.mention} is not verified. They must use `!verify_me` first.", ephemeral=True)
+            await interaction.followup.send(f"❌ {user.mention} is not verified. They must use `/verify` first.", ephemeral=True)
             return
         
+        self.bot.verified_members.add(user.id)
+        
         # Assign role if missing
         role_assigned = await self.assign_verified_role(user)
         
@@ -44,15 +75,25 @@ class BackgroundCheck(commands.Cog):
         roblox_username = verified_data['roblox_username']
         
         # Get guild settings
-        settings = db.get_guild_settings(interaction.guild_id)
+        settings = await self.bot.get_guild_settings(interaction.guild_id)
         blacklisted_ids = settings.get('blacklisted_groups', [])
         report_channel_id = settings.get('report_channel_id')
         
         try:
-            # Fetch Roblox data
-            user_info = await roblox_api.get_user_info(roblox_id)
-            groups = await roblox_api.get_user_groups(roblox_id)
-            account_age_days = await roblox_api.get_account_age_days(roblox_id)
+            # Fetch Roblox data (falls back to last-known data if Roblox is down)
+            try:
+                profile = await roblox_api.get_user_profile(roblox_id)
+            except RobloxAPIUnavailable as e:
+                print(f"Roblox unavailable for check on {roblox_id}: {e}")
+                await interaction.followup.send(
+                    "❌ Roblox is currently unavailable and there is no cached data for this user. Try again later.",
+                    ephemeral=True
+                )
+                return
+            user_info = profile['user_info']
+            groups = profile['groups']
+            account_age_days = roblox_api.account_age_days(user_info)
+            stale = profile['stale']
             
             # Check blacklisted groups
             blacklisted_found = []
@@ -63,14 +104,47 @@ class BackgroundCheck(commands.Cog):
                         'rank': group['rank']
                     })
             
+            # Check groups allied (within N hops) with blacklisted groups, from the precomputed index
+            allied_found = []
+            uncrawled = []
+            if config.GROUP_ALLY_HOPS > 0:
+                # Groups blacklisted since the last refresh aren't in the index yet
+                await group_index.ensure_roots(blacklisted_ids, config.GROUP_ALLY_HOPS)
+                uncrawled = group_index.uncrawled(blacklisted_ids)
+                allied = group_index.find_allied(
+                    [g['id'] for g in groups if g['id'] not in blacklisted_ids],
+                    blacklisted_ids,
+                    config.GROUP_ALLY_HOPS
+                )
+                for group in groups:
+                    match = allied.get(group['id'])
+                    if match:
+                        allied_found.append({
+                            'name': group['name'],
+                            'rank': group['rank'],
+                            'hops': match['hops'],
+                            'blacklisted_group_id': match['blacklisted_group_id']
+                        })
+            
             # Build report embed
             report_embed = discord.Embed(
-                title="🔍 Background Check Report",
+                title="🔍 Background Check Report" + (" (stale data)" if stale else ""),
                 description=f"Target: {user.mention}",
-                color=0xff0000 if blacklisted_found else 0x00ff00,
+                color=0xff0000 if blacklisted_found else 0xffa500 if allied_found else 0x00ff00,
                 timestamp=datetime.utcnow()
             )
             
+            if stale:
+                stale_text = "\n".join([
+                    f"• {part.replace('_', ' ')}: last fetched <t:{int(fetched_at.replace(tzinfo=timezone.utc).timestamp())}:R>"
+                    for part, fetched_at in stale.items()
+                ])
+                report_embed.add_field(
+                    name="⚠️ Roblox API degraded - showing last-known data",
+                    value=stale_text,
+                    inline=False
+                )
+            
             report_embed.add_field(name="User ID", value=str(user.id), inline=True)
             report_embed.add_field(name="Username", value=roblox_username, inline=True)
             report_embed.add_field(name="Roblox ID", value=str(roblox_id), inline=True)
@@ -86,12 +160,33 @@ class BackgroundCheck(commands.Cog):
                 blacklist_text = "\n".join([f"• **{g['name']}** - Rank: `{g['rank']}`" for g in blacklisted_found])
                 report_embed.add_field(
                     name=f"⚠️ Blacklisted Groups ({len(blacklisted_found)})",
-                    value=blacklist_text,
+                    value=blacklist_text[:1024],
                     inline=False
                 )
             else:
                 report_embed.add_field(name="Blacklisted Groups", value="✅ None found", inline=False)
             
+            if allied_found:
+                allied_text = "\n".join([
+                    f"• **{g['name']}** - Rank: `{g['rank']}` "
+                    f"({g['hops']} hop{'s' if g['hops'] != 1 else ''} from "
+                    f"{group_index.group_names.get(g['blacklisted_group_id'], g['blacklisted_group_id'])})"
+                    for g in allied_found
+                ])
+                report_embed.add_field(
+                    name=f"⚠️ Allied with Blacklisted Groups ({len(allied_found)})",
+                    value=allied_text[:1024],
+                    inline=False
+                )
+            
+            if uncrawled:
+                report_embed.add_field(
+                    name="⚠️ Ally Check Incomplete",
+                    value=f"Allies of {len(uncrawled)} blacklisted group(s) haven't been crawled yet "
+                          f"(next refresh within {config.GROUP_CRAWL_INTERVAL_MINUTES} min)",
+                    inline=False
+                )
+            
             # Add role status
             if role_assigned:
                 report_embed.add_field(name="Role Status", value="✅ BotVerified role assigned", inline=False)
@@ -102,9 +197,10 @@ class BackgroundCheck(commands.Cog):
             if report_channel_id:
                 report_channel = self.bot.get_channel(report_channel_id)
                 if report_channel:
-                    await report_channel.send(embed=report_embed)
+                    self.bot.reports.enqueue(report_channel, report_embed)
             
-            await interaction.followup.send(f"✅ Report generated and sent to <#{report_channel_id}>", ephemeral=True)
+            stale_note = " ⚠️ Roblox is degraded, report uses last-known data." if stale else ""
+            await interaction.followup.send(f"✅ Report generated and queued for <#{report_channel_id}>{stale_note}", ephemeral=True)
             
         except Exception as e:
             print(f"Error in check command: {e}")
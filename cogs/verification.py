@@ -1,52 +1,65 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 from discord.ui import Button, View
 import secrets
 from database import db
 from config import config
 
+VERIFY_BUTTON_ID = "authchecker:verify"
+
+class VerifyPanel(View):
+    """Persistent "Verify" button; survives restarts because of its fixed custom_id"""
+
+    def __init__(self, cog: "Verification"):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @discord.ui.button(label="Verify", style=discord.ButtonStyle.primary, emoji="🔗", custom_id=VERIFY_BUTTON_ID)
+    async def verify_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.cog.verify_interaction(interaction)
+
 class Verification(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-    
-    @commands.command(name="verify_me")
-    async def verify_me(self, ctx: commands.Context):
-        """Get Roblox verification link"""
-        discord_id = ctx.author.id
-        guild_id = ctx.guild.id
-        
+
+    async def cog_load(self):
+        # Re-attach the handler for panels posted before this process started
+        self.bot.add_view(VerifyPanel(self))
+
+    async def start_verification(self, member: discord.Member):
+        """Shared verification logic. Returns (message, embed, view); embed and view are None when no link is needed"""
+        discord_id = member.id
+        guild_id = member.guild.id
+
         # Check if already verified (has BotVerified role)
-        bot_verified_role = discord.utils.get(ctx.guild.roles, name="BotVerified")
-        if bot_verified_role and bot_verified_role in ctx.author.roles:
-            await ctx.send("✅ You're already verified!", delete_after=10)
-            return
-        
+        bot_verified_role = discord.utils.get(member.guild.roles, name="BotVerified")
+        if bot_verified_role and bot_verified_role in member.roles:
+            return "✅ You're already verified!", None, None
+
         # Check if already verified in database too
-        if await db.is_verified(discord_id):
+        if await self.bot.is_verified(discord_id):
             # Give role if missing
-            if bot_verified_role and bot_verified_role not in ctx.author.roles:
+            if bot_verified_role and bot_verified_role not in member.roles:
                 try:
-                    await ctx.author.add_roles(bot_verified_role)
-                    await ctx.send("✅ You're verified! Role assigned.", delete_after=10)
+                    await member.add_roles(bot_verified_role)
+                    return "✅ You're verified! Role assigned.", None, None
                 except:
-                    await ctx.send("✅ You're verified! (Could not assign role, contact admin)", delete_after=10)
-            else:
-                await ctx.send("✅ You're already verified!", delete_after=10)
-            return
-        
+                    return "✅ You're verified! (Could not assign role, contact admin)", None, None
+            return "✅ You're already verified!", None, None
+
         # Generate state code
         state_code = secrets.token_urlsafe(32)
         await db.create_pending_verification(discord_id, state_code, guild_id)
-        
+
         # Get credentials from database, fall back to environment variables
-        creds = db.get_credentials()
+        creds = await db.get_credentials_async()
         client_id = creds.get('roblox_client_id', '') or config.ROBLOX_CLIENT_ID
         redirect_uri = creds.get('roblox_redirect_uri', '') or config.ROBLOX_REDIRECT_URI
-        
+
         if not client_id or not redirect_uri:
-            await ctx.send("❌ Bot not fully configured yet. Contact admin.", delete_after=10)
-            return
-        
+            return "❌ Bot not fully configured yet. Contact admin.", None, None
+
         # Create OAuth URL
         auth_url = (
             f"https://apis.roblox.com/oauth/v1/authorize?"
@@ -56,19 +69,72 @@ class Verification(commands.Cog):
             f"scope=openid profile&"
             f"state={state_code}"
         )
-        
+
         # Create link button
         view = View()
         link_button = Button(label="🔗 Click to Verify", url=auth_url, style=discord.ButtonStyle.link)
         view.add_item(link_button)
-        
+
         embed = discord.Embed(
             title="Roblox Verification",
             description="Click the button below to verify your Roblox account.\n\nThis link is unique to you and expires in 10 minutes.",
             color=0x00ffff
         )
         embed.set_footer(text="AuthChecker System")
-        
+        return None, embed, view
+
+    async def verify_interaction(self, interaction: discord.Interaction):
+        """Answer /verify and the Verify button with an ephemeral (private) link"""
+        if interaction.guild is None:
+            await interaction.response.send_message("❌ Use this in a server.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        message, embed, view = await self.start_verification(interaction.user)
+        if embed:
+            await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+        else:
+            await interaction.followup.send(message, ephemeral=True)
+
+    @app_commands.command(name="verify", description="Get your Roblox verification link")
+    @app_commands.guild_only()
+    async def verify_command(self, interaction: discord.Interaction):
+        await self.verify_interaction(interaction)
+
+    @app_commands.command(name="verify_panel", description="Post a persistent Verify button in this channel (Admin only)")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(administrator=True)
+    async def verify_panel_command(self, interaction: discord.Interaction):
+        embed = discord.Embed(
+            title="Roblox Verification",
+            description="Press **Verify** to link your Roblox account.",
+            color=0x00ffff
+        )
+        embed.set_footer(text="AuthChecker System")
+        try:
+            await interaction.channel.send(embed=embed, view=VerifyPanel(self))
+        except discord.HTTPException:
+            await interaction.response.send_message(
+                "❌ I can't post in this channel. Check that I have Send Messages and Embed Links here.",
+                ephemeral=True
+            )
+            return
+        await interaction.response.send_message("✅ Verify panel posted.", ephemeral=True)
+
+    @verify_panel_command.error
+    async def verify_panel_error(self, interaction: discord.Interaction, error):
+        if isinstance(error, app_commands.MissingPermissions):
+            await interaction.response.send_message("❌ You need Administrator permission to use this.", ephemeral=True)
+
+    @commands.command(name="verify_me")
+    @commands.guild_only()
+    async def verify_me(self, ctx: commands.Context):
+        """Get Roblox verification link (legacy prefix command, needs ENABLE_PREFIX_COMMANDS)"""
+        message, embed, view = await self.start_verification(ctx.author)
+        if not embed:
+            await ctx.send(message, delete_after=10)
+            return
+
         # Send DM for privacy
         try:
             await ctx.author.send(embed=embed, view=view)
@@ -77,10 +143,12 @@ class Verification(commands.Cog):
             # Can't DM, send in channel but delete quickly
             msg = await ctx.send(f"{ctx.author.mention}", embed=embed, view=view)
             await msg.delete(delay=30)
-    
+
     @commands.Cog.listener()
     async def on_ready(self):
         print("Verification cog ready")
 
 async def setup(bot):
-    await bot.add_cog(Verification(bot))
\ No newline at end of file
+    await bot.add_cog(Verification(bot))
+    if not config.ENABLE_PREFIX_COMMANDS:
+        bot.remove_command('verify_me')
@@ -18,6 +18,45 @@ class Config:
     # Database
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///authchecker.db')
     
+    # Legacy prefix commands (!verify_me) need the privileged message_content
+    # intent; /verify and the Verify button work without it
+    ENABLE_PREFIX_COMMANDS = os.getenv('ENABLE_PREFIX_COMMANDS', 'false').lower() == 'true'
+    
+    # Log event loop stalls longer than this (0 disables the detector)
+    LOOP_BLOCK_THRESHOLD_MS = int(os.getenv('LOOP_BLOCK_THRESHOLD_MS', '100'))
+    
+    # Roblox API resilience: per-request timeout (seconds) and per-endpoint
+    # circuit breakers that open after N consecutive failures
+    ROBLOX_API_TIMEOUT = float(os.getenv('ROBLOX_API_TIMEOUT', '5'))
+    ROBLOX_BREAKER_FAILURES = int(os.getenv('ROBLOX_BREAKER_FAILURES', '5'))
+    ROBLOX_BREAKER_RESET_SECONDS = float(os.getenv('ROBLOX_BREAKER_RESET_SECONDS', '30'))
+    
+    # Transitive blacklist: flag groups within this many ally hops of a
+    # blacklisted group (0 disables the ally graph)
+    GROUP_ALLY_HOPS = int(os.getenv('GROUP_ALLY_HOPS', '1'))
+    GROUP_CRAWL_INTERVAL_MINUTES = int(os.getenv('GROUP_CRAWL_INTERVAL_MINUTES', '60'))
+    GROUP_RECRAWL_AFTER_HOURS = int(os.getenv('GROUP_RECRAWL_AFTER_HOURS', '24'))
+    GROUP_CRAWL_REQUESTS_PER_SECOND = float(os.getenv('GROUP_CRAWL_REQUESTS_PER_SECOND', '1'))
+    
+    # Report delivery: reports are batched per channel (up to 10 embeds per
+    # message), flushed on this timer and paced to N messages per window
+    REPORT_FLUSH_SECONDS = float(os.getenv('REPORT_FLUSH_SECONDS', '2'))
+    REPORT_CHANNEL_RATE = int(os.getenv('REPORT_CHANNEL_RATE', '5'))
+    REPORT_CHANNEL_PER_SECONDS = float(os.getenv('REPORT_CHANNEL_PER_SECONDS', '5'))
+    
+    # Sharding
+    SHARDED = os.getenv('SHARDED', 'false').lower() == 'true'
+    SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0')) or None  # None = ask Discord
+    SHARD_IDS = os.getenv('SHARD_IDS', '')  # e.g. "0-3,8"; blank = all shards
+    SHARD_PROCESSES = int(os.getenv('SHARD_PROCESSES', '1'))
+    SHARD_STATUS_INTERVAL = int(os.getenv('SHARD_STATUS_INTERVAL', '30'))
+    
+    # Member caching: 'full' keeps every member resident and chunks at startup,
+    # 'lean' caches no members and skips chunking (verified user IDs are cached either way)
+    MEMBER_CACHE_MODE = os.getenv('MEMBER_CACHE_MODE', 'full').lower()
+    VERIFIED_MEMBER_CACHE_SIZE = int(os.getenv('VERIFIED_MEMBER_CACHE_SIZE', '10000'))
+    VERIFIED_MEMBER_CACHE_TTL = int(os.getenv('VERIFIED_MEMBER_CACHE_TTL', '300'))  # seconds
+    
     # Default channels (can be overridden per guild)
     VERIFY_CHANNEL_ID = 1251815787123970049
     REPORT_CHANNEL_ID = 1467399827590484078
@@ -1,12 +1,22 @@
 import os
+import asyncio
 import aiosqlite
 import sqlite3
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 
 class Database:
     def __init__(self, db_path: str = None):
         self.db_path = db_path or os.getenv('DATABASE_URL', 'sqlite:///authchecker.db').replace('sqlite:///', '')
+        # Dedicated pool for sync sqlite3 calls made from the bot's event loop,
+        # so a disk stall can't block the gateway or starve the default executor
+        self._executor = ThreadPoolExecutor(max_workers=int(os.getenv('DB_EXECUTOR_WORKERS', '4')),
+                                            thread_name_prefix='db-sync')
+    
+    async def _run_sync(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
     
     async def init(self):
         """Initialize async database"""
@@ -57,6 +67,55 @@ class Database:
                 )
             ''')
             
+            # Cached Roblox group ally graph
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS group_relationships (
+                    group_id INTEGER,
+                    related_group_id INTEGER,
+                    relationship TEXT,  -- Roblox relationship type, e.g. 'Allies'
+                    related_group_name TEXT,
+                    PRIMARY KEY (group_id, related_group_id, relationship)
+                )
+            ''')
+            
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS group_crawl_state (
+                    group_id INTEGER PRIMARY KEY,
+                    crawled_at TIMESTAMP
+                )
+            ''')
+            
+            # Last-known Roblox API responses, served while Roblox is down
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS roblox_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    data TEXT,  -- JSON
+                    fetched_at TIMESTAMP
+                )
+            ''')
+            
+            # Per-shard health (written by each bot process, read by the web server)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS shard_status (
+                    shard_id INTEGER PRIMARY KEY,
+                    status TEXT,
+                    latency_ms REAL,
+                    guild_count INTEGER,
+                    reconnects INTEGER,
+                    pid INTEGER,
+                    updated_at TIMESTAMP
+                )
+            ''')
+            
+            # How many shards the deployment expects, so shards that never report show up as missing
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS shard_config (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    shard_count INTEGER,
+                    updated_at TIMESTAMP
+                )
+            ''')
+            
             await db.commit()
     
     # Credentials (sync - for startup)
@@ -73,6 +132,9 @@ class Database:
                 }
             return {}
     
+    async def get_credentials_async(self) -> Dict[str, str]:
+        return await self._run_sync(self.get_credentials)
+    
     def save_credentials(self, discord_token: str, roblox_client_id: str = '', 
                         roblox_client_secret: str = '', roblox_redirect_uri: str = ''):
         with sqlite3.connect(self.db_path) as db:
@@ -99,6 +161,9 @@ class Database:
                 }
             return {}
     
+    async def get_guild_settings_async(self, guild_id: int) -> Dict[str, Any]:
+        return await self._run_sync(self.get_guild_settings, guild_id)
+    
     def save_guild_settings(self, guild_id: int, verify_channel_id: int = None,
                            report_channel_id: int = None, unverified_role_id: int = None,
                            verified_role_id: int = None, blacklisted_groups: list = None):
@@ -131,11 +196,13 @@ class Database:
             )
             await db.commit()
     
-    async def get_pending_verification(self, state_code: str) -> Optional[tuple]:
+    async def get_pending_verification(self, state_code: str, max_age_minutes: int = 10) -> Optional[tuple]:
+        """(discord_id, guild_id) for a verification link, or None if unknown or past its lifetime"""
+        cutoff = datetime.utcnow() - timedelta(minutes=max_age_minutes)
         async with aiosqlite.connect(self.db_path) as db:
             async with db.execute(
-                "SELECT discord_id, guild_id FROM pending_verifications WHERE state_code = ?",
-                (state_code,)
+                "SELECT discord_id, guild_id FROM pending_verifications WHERE state_code = ? AND created_at >= ?",
+                (state_code, cutoff)
             ) as cursor:
                 row = await cursor.fetchone()
                 return row if row else None
@@ -170,6 +237,119 @@ class Database:
                 (discord_id,)
             ) as cursor:
                 return await cursor.fetchone() is not None
+    
+    # Group relationship graph
+    async def get_all_blacklisted_groups(self) -> List[int]:
+        """Blacklisted groups across every guild (roots for the ally graph crawl)"""
+        import json
+        groups = set()
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("SELECT blacklisted_groups FROM guild_settings") as cursor:
+                async for row in cursor:
+                    if row[0]:
+                        groups.update(json.loads(row[0]))
+        return sorted(groups)
+    
+    async def save_group_relationships(self, group_id: int, relationship: str, related_groups: List[Dict]):
+        """Replace a group's cached related groups of one relationship type"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "DELETE FROM group_relationships WHERE group_id = ? AND relationship = ?",
+                (group_id, relationship)
+            )
+            await db.executemany('''
+                INSERT OR REPLACE INTO group_relationships
+                (group_id, related_group_id, relationship, related_group_name)
+                VALUES (?, ?, ?, ?)
+            ''', [(group_id, g['id'], relationship, g['name']) for g in related_groups])
+            await db.commit()
+    
+    async def mark_group_crawled(self, group_id: int):
+        """Record that every relationship type of a group was just refreshed"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO group_crawl_state (group_id, crawled_at) VALUES (?, ?)",
+                (group_id, datetime.utcnow())
+            )
+            await db.commit()
+    
+    async def get_group_relationships(self, relationship: str = 'Allies') -> List[tuple]:
+        """All cached edges of one type as (group_id, related_group_id, related_group_name)"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT group_id, related_group_id, related_group_name FROM group_relationships WHERE relationship = ?",
+                (relationship,)
+            ) as cursor:
+                return await cursor.fetchall()
+    
+    async def get_group_crawl_times(self) -> Dict[int, datetime]:
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("SELECT group_id, crawled_at FROM group_crawl_state") as cursor:
+                return {row[0]: datetime.fromisoformat(row[1]) async for row in cursor}
+    
+    # Roblox API cache
+    async def save_roblox_cache(self, cache_key: str, data: Any):
+        import json
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO roblox_cache (cache_key, data, fetched_at) VALUES (?, ?, ?)",
+                (cache_key, json.dumps(data), datetime.utcnow())
+            )
+            await db.commit()
+    
+    async def get_roblox_cache(self, cache_key: str) -> Optional[tuple]:
+        """Returns (data, fetched_at) or None"""
+        import json
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT data, fetched_at FROM roblox_cache WHERE cache_key = ?",
+                (cache_key,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return (json.loads(row[0]), datetime.fromisoformat(row[1])) if row else None
+    
+    # Shard health
+    async def save_shard_status(self, shards: List[Dict], pid: int, shard_count: int = None):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany('''
+                INSERT OR REPLACE INTO shard_status
+                (shard_id, status, latency_ms, guild_count, reconnects, pid, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [(s['shard_id'], s['status'], s['latency_ms'], s['guild_count'], s['reconnects'], pid, datetime.utcnow())
+                  for s in shards])
+            await db.commit()
+        if shard_count:
+            await self.save_shard_count(shard_count)
+    
+    async def save_shard_count(self, shard_count: int):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO shard_config (id, shard_count, updated_at) VALUES (1, ?, ?)",
+                (shard_count, datetime.utcnow())
+            )
+            # Rows left over from a run with more shards
+            await db.execute("DELETE FROM shard_status WHERE shard_id >= ?", (shard_count,))
+            await db.commit()
+    
+    def get_shard_count(self) -> Optional[int]:
+        with sqlite3.connect(self.db_path) as db:
+            row = db.execute("SELECT shard_count FROM shard_config WHERE id = 1").fetchone()
+            return row[0] if row else None
+    
+    def get_shard_status(self) -> List[Dict[str, Any]]:
+        with sqlite3.connect(self.db_path) as db:
+            cursor = db.execute(
+                "SELECT shard_id, status, latency_ms, guild_count, reconnects, pid, updated_at FROM shard_status ORDER BY shard_id"
+            )
+            return [{
+                'shard_id': row[0],
+                'status': row[1],
+                'latency_ms': row[2],
+                'guild_count': row[3],
+                'reconnects': row[4],
+                'pid': row[5],
+                'updated_at': row[6]
+            } for row in cursor.fetchall()]
 
 # Global instance
 db = Database()
\ No newline at end of file
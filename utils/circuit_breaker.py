@@ -0,0 +1,71 @@
+import threading
+import time
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker: closed -> open after repeated failures -> half-open single probe"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        # Shared by the bot's event loop and the web server's request threads
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may go out now; in half-open state only one probe is let through"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                if time.monotonic() - self._probe_started < self.reset_timeout:
+                    return False
+                # The probe never reported back; count it as failed so it can't wedge the breaker
+                print(f"Circuit '{self.name}' probe timed out, reopening")
+                self._probe_in_flight = False
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return False
+            self._probe_in_flight = True
+            self._probe_started = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"Circuit '{self.name}' closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """Give back an allowed request that ended without an outcome (e.g. cancelled)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"Circuit '{self.name}' opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures}
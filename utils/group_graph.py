@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Set
+from database import db
+from utils.roblox_api import roblox_api, RobloxAPIUnavailable
+
+# Only alliances feed reachability, so enemies aren't crawled
+RELATIONSHIPS = ('Allies',)
+
+class GroupGraphIndex:
+    """Locally cached Roblox ally graph with precomputed reachability from blacklisted groups"""
+
+    def __init__(self):
+        # blacklisted group -> {allied group: hops}
+        self.reachable: Dict[int, Dict[int, int]] = {}
+        self.group_names: Dict[int, str] = {}
+        # Groups whose allies have been fetched at least once
+        self.crawled: Set[int] = set()
+        self._lock = asyncio.Lock()
+        self._next_request = 0.0
+
+    async def _throttle(self, requests_per_second: float):
+        """Space crawl requests out so the crawler never bursts against the groups API"""
+        now = time.monotonic()
+        wait = self._next_request - now
+        self._next_request = max(now, self._next_request) + 1 / requests_per_second
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _load_ally_graph(self) -> Dict[int, Set[int]]:
+        graph: Dict[int, Set[int]] = {}
+        for group_id, related_id, related_name in await db.get_group_relationships('Allies'):
+            # Alliances are mutual on Roblox, so treat edges as undirected
+            graph.setdefault(group_id, set()).add(related_id)
+            graph.setdefault(related_id, set()).add(group_id)
+            if related_name:
+                self.group_names[related_id] = related_name
+        return graph
+
+    async def rebuild(self, roots: List[int], max_hops: int):
+        """Recompute reachability sets from the cached graph (no API calls)"""
+        graph = await self._load_ally_graph()
+        self.crawled = set(await db.get_group_crawl_times())
+        reachable = {}
+        for root in roots:
+            hops = {root: 0}
+            queue = deque([root])
+            while queue:
+                group_id = queue.popleft()
+                if hops[group_id] >= max_hops:
+                    continue
+                for neighbour in graph.get(group_id, ()):
+                    if neighbour not in hops:
+                        hops[neighbour] = hops[group_id] + 1
+                        queue.append(neighbour)
+            del hops[root]
+            reachable[root] = hops
+        self.reachable = reachable
+
+    async def ensure_roots(self, roots: List[int], max_hops: int):
+        """Rebuild from the cached graph if any of roots was blacklisted since the last rebuild"""
+        if any(root not in self.reachable for root in roots):
+            await self.rebuild(await db.get_all_blacklisted_groups(), max_hops)
+
+    def uncrawled(self, roots: List[int]) -> List[int]:
+        """Roots whose allies haven't been fetched yet, so ally matches for them are incomplete"""
+        return [root for root in roots if root not in self.crawled]
+
+    async def refresh(self, max_hops: int, recrawl_after: timedelta, requests_per_second: float) -> int:
+        """Crawl stale groups near blacklisted groups, then rebuild reachability. Returns groups crawled"""
+        async with self._lock:
+            roots = await db.get_all_blacklisted_groups()
+            crawl_times = await db.get_group_crawl_times()
+            graph = await self._load_ally_graph()
+            cutoff = datetime.utcnow() - recrawl_after
+            crawled = 0
+            roblox_down = False
+
+            # Groups at the edge (max_hops away) never need their own allies fetched
+            seen = {root: 0 for root in roots}
+            queue = deque(roots)
+            while queue:
+                group_id = queue.popleft()
+                depth = seen[group_id]
+                if depth >= max_hops:
+                    continue
+
+                # Only groups never crawled, or crawled before the cutoff, hit the API
+                last_crawled = crawl_times.get(group_id)
+                if not roblox_down and (last_crawled is None or last_crawled < cutoff):
+                    for relationship in RELATIONSHIPS:
+                        try:
+                            related = await roblox_api.get_group_relationships(
+                                group_id, relationship, lambda: self._throttle(requests_per_second)
+                            )
+                        except RobloxAPIUnavailable as e:
+                            # Stop crawling for this round but still walk the cached graph
+                            print(f"Group graph crawl paused: {e}")
+                            roblox_down = True
+                            break
+                        if related is None:
+                            # Refused; keep the cached edges and retry next refresh
+                            break
+                        await db.save_group_relationships(group_id, relationship, related)
+                        if relationship == 'Allies':
+                            for group in related:
+                                graph.setdefault(group_id, set()).add(group['id'])
+                                graph.setdefault(group['id'], set()).add(group_id)
+                    else:
+                        # Stamped only once every relationship type is saved, so a
+                        # partial crawl is retried on the next refresh
+                        await db.mark_group_crawled(group_id)
+                        crawled += 1
+
+                for neighbour in graph.get(group_id, ()):
+                    if neighbour not in seen:
+                        seen[neighbour] = depth + 1
+                        queue.append(neighbour)
+
+            await self.rebuild(roots, max_hops)
+            return crawled
+
+    def find_allied(self, group_ids: List[int], blacklisted_ids: List[int], max_hops: int) -> Dict[int, Dict]:
+        """Map each of group_ids within max_hops of a blacklisted group to its closest blacklisted group"""
+        matches = {}
+        for root in blacklisted_ids:
+            reachable = self.reachable.get(root, {})
+            for group_id in group_ids:
+                hops = reachable.get(group_id)
+                if hops is None or hops > max_hops:
+                    continue
+                if group_id not in matches or hops < matches[group_id]['hops']:
+                    matches[group_id] = {'blacklisted_group_id': root, 'hops': hops}
+        return matches
+
+group_index = GroupGraphIndex()
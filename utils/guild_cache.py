@@ -0,0 +1,27 @@
+import time
+from typing import Any, Dict, Iterable, Tuple
+from database import db
+
+class GuildSettingsCache:
+    """Short-lived per-guild cache of guild_settings rows"""
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+
+    async def get(self, guild_id: int) -> Dict[str, Any]:
+        entry = self._entries.get(guild_id)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        settings = await db.get_guild_settings_async(guild_id)
+        self._entries[guild_id] = (time.monotonic(), settings)
+        return settings
+
+    def invalidate(self, guild_ids: Iterable[int] = None):
+        """Drop cached settings for the given guilds, or everything if none given"""
+        if guild_ids is None:
+            self._entries.clear()
+            return
+        for guild_id in guild_ids:
+            self._entries.pop(guild_id, None)
@@ -0,0 +1,46 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+class LoopBlockDetector:
+    """Watchdog thread that logs when the event loop is blocked longer than a threshold"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float = 0.1, interval: float = None):
+        self.loop = loop
+        self.threshold = threshold
+        # Probe often enough that a stall can't hide between two probes
+        self.interval = interval if interval is not None else threshold / 2
+        # Must be created on the loop's thread
+        self._loop_thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name='loop-block-detector', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _watch(self):
+        while not self._stopped.is_set():
+            answered = threading.Event()
+            started = time.monotonic()
+            try:
+                self.loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                # Loop closed
+                return
+
+            if not answered.wait(self.threshold):
+                # Grab the loop thread's stack while it is still blocked so the
+                # log points at the offending callback
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = ''.join(traceback.format_stack(frame)) if frame else '<unavailable>\n'
+                while not answered.wait(1) and not self._stopped.is_set():
+                    pass
+                blocked_ms = (time.monotonic() - started) * 1000
+                print(f"WARNING: event loop blocked for {blocked_ms:.0f}ms (threshold {self.threshold * 1000:.0f}ms)\n{stack}", end='')
+
+            self._stopped.wait(self.interval)
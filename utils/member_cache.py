@@ -0,0 +1,32 @@
+import time
+from collections import OrderedDict
+
+class VerifiedMemberCache:
+    """Bounded LRU of user IDs known to be verified, so repeat checks skip the database"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300):
+        self.max_size = max_size
+        # Verifications can be undone (re-linking a Roblox account replaces the
+        # other Discord user's row), so entries are only trusted for ttl seconds
+        self.ttl = ttl
+        # IDs only: Member objects would go stale without discord.py's member cache
+        self._user_ids: "OrderedDict[int, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def __contains__(self, user_id: int) -> bool:
+        expires_at = self._user_ids.get(user_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._user_ids[user_id]
+            return False
+        self._user_ids.move_to_end(user_id)
+        return True
+
+    def add(self, user_id: int):
+        self._user_ids[user_id] = time.monotonic() + self.ttl
+        self._user_ids.move_to_end(user_id)
+        while len(self._user_ids) > self.max_size:
+            self._user_ids.popitem(last=False)
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List
+import discord
+
+class ReportDispatcher:
+    """Queues report embeds per channel and sends them in packed, rate-paced batches"""
+
+    # Discord limits per message
+    MAX_EMBEDS_PER_MESSAGE = 10
+    MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+    def __init__(self, flush_interval: float = 2.0, rate: int = 5, per: float = 5.0):
+        self.flush_interval = flush_interval
+        self.rate = rate
+        self.per = per
+        self._queues: Dict[int, Deque[discord.Embed]] = {}
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        self._wake: Dict[int, asyncio.Event] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        # Recent send times per channel, for pacing to the channel's rate-limit bucket
+        self._sent: Dict[int, Deque[float]] = {}
+
+    def enqueue(self, channel: discord.abc.Messageable, embed: discord.Embed):
+        """Queue an embed for a channel; it is sent within flush_interval, or sooner once a full message is queued"""
+        channel_id = channel.id
+        queue = self._queues.setdefault(channel_id, deque())
+        queue.append(embed)
+        self._channels[channel_id] = channel
+        wake = self._wake.setdefault(channel_id, asyncio.Event())
+        if len(queue) >= self.MAX_EMBEDS_PER_MESSAGE:
+            wake.set()
+
+        worker = self._workers.get(channel_id)
+        if worker is None or worker.done():
+            self._workers[channel_id] = asyncio.create_task(self._run(channel_id))
+
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def flush(self):
+        """Send everything queued now (used on shutdown)"""
+        for wake in self._wake.values():
+            wake.set()
+        workers = [worker for worker in self._workers.values() if not worker.done()]
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        for wake in self._wake.values():
+            wake.clear()
+
+    def _next_batch(self, queue: Deque[discord.Embed]) -> List[discord.Embed]:
+        batch = [queue.popleft()]
+        chars = len(batch[0])
+        while queue and len(batch) < self.MAX_EMBEDS_PER_MESSAGE:
+            size = len(queue[0])
+            if chars + size > self.MAX_EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(queue.popleft())
+            chars += size
+        return batch
+
+    async def _wait_for_bucket(self, channel_id: int):
+        sent = self._sent.setdefault(channel_id, deque(maxlen=self.rate))
+        if len(sent) == self.rate:
+            wait = self.per - (time.monotonic() - sent[0])
+            if wait > 0:
+                await asyncio.sleep(wait)
+        sent.append(time.monotonic())
+
+    async def _run(self, channel_id: int):
+        queue = self._queues[channel_id]
+        wake = self._wake[channel_id]
+
+        # Give more reports a chance to arrive so they share a message
+        try:
+            await asyncio.wait_for(wake.wait(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            pass
+        wake.clear()
+
+        while queue:
+            batch = self._next_batch(queue)
+            if not await self._send(channel_id, batch) and len(batch) > 1:
+                # A 4xx on a batch is usually one bad embed; resend singly so only that one is lost
+                for embed in batch:
+                    await self._send(channel_id, [embed])
+
+    async def _send(self, channel_id: int, embeds: List[discord.Embed]) -> bool:
+        """Send one paced message. Returns False only if Discord rejected the content itself (a non-auth 4xx)"""
+        await self._wait_for_bucket(channel_id)
+        try:
+            await self._channels[channel_id].send(embeds=embeds)
+            return True
+        except discord.HTTPException as e:
+            print(f"Error sending {len(embeds)} report(s) to channel {channel_id}: {e}")
+            # Permission/missing-channel errors would fail for every embed, so don't retry those
+            return not 400 <= e.status < 500 or e.status in (401, 403, 404)
@@ -1,56 +1,159 @@
+import asyncio
 import aiohttp
 import requests
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from config import config
+from database import db
+from utils.circuit_breaker import CircuitBreaker
+
+class RobloxAPIUnavailable(Exception):
+    """Roblox endpoint timed out, errored, is rate limiting us, or its circuit is open"""
 
 class RobloxAPI:
+    ENDPOINTS = ('user_info', 'user_groups', 'group_relationships', 'oauth_token', 'oauth_userinfo')
+
     def __init__(self):
         self.base_url = "https://api.roblox.com"
         self.users_url = "https://users.roblox.com"
         self.groups_url = "https://groups.roblox.com"
-    
+        self.oauth_url = "https://apis.roblox.com/oauth"
+        self.timeout = config.ROBLOX_API_TIMEOUT
+        self.breakers = {
+            endpoint: CircuitBreaker(endpoint, config.ROBLOX_BREAKER_FAILURES, config.ROBLOX_BREAKER_RESET_SECONDS)
+            for endpoint in self.ENDPOINTS
+        }
+
+    async def _get_json(self, endpoint: str, url: str, params: dict = None) -> Tuple[int, Optional[Dict]]:
+        """GET through the endpoint's circuit breaker. Returns (status, json or None); raises RobloxAPIUnavailable"""
+        breaker = self.breakers[endpoint]
+        if not breaker.allow():
+            raise RobloxAPIUnavailable(f"{endpoint}: circuit open")
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+                async with session.get(url, params=params) as resp:
+                    if resp.status == 429 or resp.status >= 500:
+                        raise RobloxAPIUnavailable(f"{endpoint}: HTTP {resp.status}")
+                    data = await resp.json() if resp.status == 200 else None
+        except RobloxAPIUnavailable:
+            breaker.record_failure()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            breaker.record_failure()
+            raise RobloxAPIUnavailable(f"{endpoint}: {type(e).__name__}") from e
+        except BaseException:
+            # Cancelled (shutdown, cog unload, outer wait_for) - free the probe slot
+            breaker.release()
+            raise
+        breaker.record_success()
+        return resp.status, data
+
+    def _request_sync(self, endpoint: str, method: str, url: str, **kwargs) -> requests.Response:
+        """Sync counterpart of _get_json for the web server's OAuth calls"""
+        breaker = self.breakers[endpoint]
+        if not breaker.allow():
+            raise RobloxAPIUnavailable(f"{endpoint}: circuit open")
+        try:
+            response = requests.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            breaker.record_failure()
+            raise RobloxAPIUnavailable(f"{endpoint}: {type(e).__name__}") from e
+        except BaseException:
+            breaker.release()
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.record_failure()
+            raise RobloxAPIUnavailable(f"{endpoint}: HTTP {response.status_code}")
+        breaker.record_success()
+        return response
+
+    def breaker_status(self, endpoints: Tuple[str, ...] = None) -> Dict[str, Dict]:
+        """State of this process's breakers (all of them, or just the given endpoints)"""
+        return {endpoint: breaker.status() for endpoint, breaker in self.breakers.items()
+                if endpoints is None or endpoint in endpoints}
+
     async def get_user_info(self, user_id: int) -> Optional[Dict]:
         """Get Roblox user info including account age"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.users_url}/v1/users/{user_id}") as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return {
-                        'id': data['id'],
-                        'username': data['name'],
-                        'display_name': data.get('displayName', data['name']),
-                        'created': data['created'],
-                        'description': data.get('description', '')
-                    }
-                return None
-    
+        status, data = await self._get_json('user_info', f"{self.users_url}/v1/users/{user_id}")
+        if status == 200:
+            return {
+                'id': data['id'],
+                'username': data['name'],
+                'display_name': data.get('displayName', data['name']),
+                'created': data['created'],
+                'description': data.get('description', '')
+            }
+        return None
+
     async def get_user_groups(self, user_id: int) -> List[Dict]:
         """Get all groups a user is in with their ranks"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.groups_url}/v2/users/{user_id}/groups/roles") as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    groups = []
-                    for group_data in data.get('data', []):
-                        group = group_data['group']
-                        role = group_data['role']
-                        groups.append({
-                            'id': group['id'],
-                            'name': group['name'],
-                            'rank': role['name'],
-                            'rank_id': role['id']
-                        })
-                    return groups
-                return []
-    
-    async def get_account_age_days(self, user_id: int) -> int:
-        """Calculate account age in days"""
-        from datetime import datetime
-        user_info = await self.get_user_info(user_id)
+        status, data = await self._get_json('user_groups', f"{self.groups_url}/v2/users/{user_id}/groups/roles")
+        if status == 200:
+            groups = []
+            for group_data in data.get('data', []):
+                group = group_data['group']
+                role = group_data['role']
+                groups.append({
+                    'id': group['id'],
+                    'name': group['name'],
+                    'rank': role['name'],
+                    'rank_id': role['id']
+                })
+            return groups
+        return []
+
+    async def get_user_profile(self, user_id: int) -> Dict:
+        """User info and groups for a background check, falling back to last-known data during outages"""
+        # 'stale' maps each part served from the cache to when it was fetched;
+        # a part that is unavailable and was never cached still raises
+        profile = {'stale': {}}
+        for part, fetch in (('user_info', self.get_user_info), ('groups', self.get_user_groups)):
+            cache_key = f"{part}:{user_id}"
+            try:
+                profile[part] = await fetch(user_id)
+                await db.save_roblox_cache(cache_key, profile[part])
+            except RobloxAPIUnavailable:
+                cached = await db.get_roblox_cache(cache_key)
+                if cached is None:
+                    raise
+                profile[part], profile['stale'][part] = cached
+        return profile
+
+    async def get_group_relationships(self, group_id: int, relationship: str = 'Allies',
+                                      throttle: Callable[[], Awaitable[None]] = None) -> Optional[List[Dict]]:
+        """Get a group's allies or enemies (None if Roblox refused the request); throttle is awaited before each page"""
+        related = []
+        start_row = 0
+        while True:
+            if throttle:
+                await throttle()
+            params = {'StartRowIndex': start_row, 'MaxRows': 100}
+            status, data = await self._get_json(
+                'group_relationships',
+                f"{self.groups_url}/v1/groups/{group_id}/relationships/{relationship}",
+                params
+            )
+            if status != 200:
+                return None
+            for group in data.get('relatedGroups') or []:
+                related.append({'id': group['id'], 'name': group.get('name', '')})
+            next_row = data.get('nextRowIndex')
+            if not next_row or next_row <= start_row or not data.get('relatedGroups'):
+                return related
+            start_row = next_row
+
+    @staticmethod
+    def account_age_days(user_info: Optional[Dict]) -> int:
+        """Account age in days from a get_user_info result"""
         if user_info:
             created = datetime.fromisoformat(user_info['created'].replace('Z', '+00:00'))
             return (datetime.utcnow() - created.replace(tzinfo=None)).days
         return 0
-    
+
+    async def get_account_age_days(self, user_id: int) -> int:
+        """Calculate account age in days"""
+        return self.account_age_days(await self.get_user_info(user_id))
+
     def exchange_code_for_token(self, code: str, client_id: str, client_secret: str, redirect_uri: str) -> Optional[Dict]:
         """Exchange OAuth code for access token (sync - called from web server)"""
         token_data = {
@@ -60,18 +163,18 @@ class RobloxAPI:
             'code': code,
             'redirect_uri': redirect_uri
         }
-        
-        response = requests.post('https://apis.roblox.com/oauth/v1/token', data=token_data)
-        
+
+        response = self._request_sync('oauth_token', 'POST', f"{self.oauth_url}/v1/token", data=token_data)
+
         if response.status_code == 200:
             return response.json()
         return None
-    
+
     def get_user_info_from_token(self, access_token: str) -> Optional[Dict]:
         """Get user info using OAuth token (sync - called from web server)"""
         headers = {'Authorization': f'Bearer {access_token}'}
-        response = requests.get('https://apis.roblox.com/oauth/v1/userinfo', headers=headers)
-        
+        response = self._request_sync('oauth_userinfo', 'GET', f"{self.oauth_url}/v1/userinfo", headers=headers)
+
         if response.status_code == 200:
             data = response.json()
             return {
@@ -80,4 +183,4 @@ class RobloxAPI:
             }
         return None
 
-roblox_api = RobloxAPI()
\ No newline at end of file
+roblox_api = RobloxAPI()
@@ -0,0 +1,76 @@
+import math
+import time
+from typing import Dict, List, Optional, Set
+
+def parse_shard_ids(spec: str) -> Optional[List[int]]:
+    """Parse a shard spec like "0-3,8" into a sorted list of shard IDs"""
+    if not spec or not spec.strip():
+        return None
+
+    shard_ids = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            shard_ids.update(range(int(start), int(end) + 1))
+        else:
+            shard_ids.add(int(part))
+    return sorted(shard_ids)
+
+def split_shard_ids(shard_ids: List[int], processes: int) -> List[List[int]]:
+    """Split shard IDs into contiguous ranges, one per process"""
+    processes = max(1, min(processes, len(shard_ids)))
+    size, extra = divmod(len(shard_ids), processes)
+    ranges = []
+    start = 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(shard_ids[start:end])
+        start = end
+    return ranges
+
+class ShardMonitor:
+    """Tracks connection state and latency for each shard run by this process"""
+
+    def __init__(self):
+        self.shards: Dict[int, Dict] = {}
+        # Shards that dropped and haven't come back yet; a re-identify passes through
+        # 'connecting' first, so the previous status alone can't tell us this
+        self._disconnected: Set[int] = set()
+
+    def mark(self, shard_id: int, status: str):
+        shard = self.shards.setdefault(shard_id, {
+            'shard_id': shard_id,
+            'status': status,
+            'latency_ms': None,
+            'guild_count': 0,
+            'reconnects': 0,
+            'last_event': None
+        })
+        if status == 'disconnected':
+            self._disconnected.add(shard_id)
+        elif status in ('ready', 'resumed') and shard_id in self._disconnected:
+            self._disconnected.discard(shard_id)
+            shard['reconnects'] += 1
+        shard['status'] = status
+        shard['last_event'] = time.time()
+
+    def snapshot(self, bot) -> List[Dict]:
+        """Refresh latency and guild counts from the bot and return per-shard health"""
+        guild_counts: Dict[int, int] = {}
+        for guild in bot.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+
+        for shard_id, shard_info in bot.shards.items():
+            shard = self.shards.get(shard_id)
+            if shard is None:
+                continue
+            latency = shard_info.latency
+            shard['latency_ms'] = round(latency * 1000, 1) if math.isfinite(latency) else None
+            shard['guild_count'] = guild_counts.get(shard_id, 0)
+            if shard_info.is_closed():
+                shard['status'] = 'disconnected'
+
+        return [dict(shard) for _, shard in sorted(self.shards.items())]
@@ -1,10 +1,11 @@
 from flask import Flask, request, redirect, render_template, session, flash
 from database import db
-from utils.roblox_api import roblox_api
+from utils.roblox_api import roblox_api, RobloxAPIUnavailable
 from config import config
 import os
 import asyncio
 import sqlite3
+from datetime import datetime, timedelta
 
 app = Flask(__name__, 
     template_folder='dashboard/templates',
@@ -92,13 +93,17 @@ def callback():
     if not all([client_id, client_secret, redirect_uri]):
         return "Bot not configured", 500
     
-    token_info = roblox_api.exchange_code_for_token(code, client_id, client_secret, redirect_uri)
-    
-    if not token_info:
-        return "Authentication failed", 400
-    
-    access_token = token_info['access_token']
-    user_info = roblox_api.get_user_info_from_token(access_token)
+    try:
+        token_info = roblox_api.exchange_code_for_token(code, client_id, client_secret, redirect_uri)
+        
+        if not token_info:
+            return "Authentication failed", 400
+        
+        access_token = token_info['access_token']
+        user_info = roblox_api.get_user_info_from_token(access_token)
+    except RobloxAPIUnavailable as e:
+        print(f"Roblox unavailable during callback: {e}")
+        return "Roblox is unavailable right now. Please try again in a few minutes.", 503
     
     if not user_info:
         return "Failed to get user info", 400
@@ -134,14 +139,34 @@ def callback():
             <div class="success">✓</div>
             <h1>Verification Successful!</h1>
             <p>Your Roblox account (@""" + roblox_username + """) has been linked.</p>
-            <p>Return to Discord and use <code>!verify_me</code> again to get your role.</p>
+            <p>Return to Discord and use <code>/verify</code> again to get your role.</p>
         </body>
     </html>
     """
 
 @app.route('/health')
 def health():
-    return {"status": "ok"}
+    # Breakers are per process. Only report the OAuth ones this web server uses:
+    # the users/groups breakers live in the bot, which may be other processes
+    return {"status": "ok", "roblox": roblox_api.breaker_status(('oauth_token', 'oauth_userinfo'))}
+
+@app.route('/health/shards')
+def shard_health():
+    shards = db.get_shard_status()
+    # A shard process that crashed stops reporting; don't trust its last status
+    stale_after = timedelta(seconds=2 * config.SHARD_STATUS_INTERVAL)
+    now = datetime.utcnow()
+    for shard in shards:
+        shard['stale'] = now - datetime.fromisoformat(shard['updated_at']) > stale_after
+    # Shards that should exist but never reported (e.g. their process died at startup)
+    shard_count = db.get_shard_count()
+    if shard_count:
+        reported = {s['shard_id'] for s in shards}
+        shards.extend({'shard_id': shard_id, 'status': 'missing', 'stale': True}
+                      for shard_id in range(shard_count) if shard_id not in reported)
+        shards.sort(key=lambda s: s['shard_id'])
+    healthy = bool(shards) and all(s['status'] in ('ready', 'resumed') and not s['stale'] for s in shards)
+    return {"status": "ok" if healthy else "degraded", "shards": shards}
 
 def run_web_server():
     port = int(os.environ.get('PORT', 5000))